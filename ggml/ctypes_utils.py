@@ -2,8 +2,7 @@ import ctypes
 import dataclasses
 import functools
 import inspect
-import types
-from typing import Any, Callable, Generic, Optional, Type, TypeVar
+from typing import Any, Callable, Dict, Generic, Optional, Type, TypeVar
 
 T = TypeVar("T")
 
@@ -19,23 +18,41 @@ NULLPTR: Ptr[Any] = None  # type: ignore[assignment]
 
 
 def c_struct(cls: Type[T]) -> Type[T]:
-    struct = types.new_class(cls.__name__, bases=(ctypes.Structure,))
-    struct.__module__ = cls.__module__
-    struct._fields_ = [  # type: ignore
-        (k, _py_type_to_ctype(v)) for k, v in cls.__annotations__.items()
-    ]
+    fields = [(k, _py_type_to_ctype(v)) for k, v in cls.__annotations__.items()]
 
     def nice_init(self: T, *args: Any, **kwargs: Any) -> None:
         dc = cls(*args, **kwargs)
-        for k, _ in self._fields_:  # type: ignore
+        for k, _ in fields:
             setattr(self, k, getattr(dc, k))
 
-    setattr(struct, "__init__", nice_init)
-    return struct
+    # Passing `_fields_` in the class namespace lets the ctypes metaclass
+    # resolve the layout once at creation, instead of patching it afterwards.
+    struct = type(
+        cls.__name__,
+        (ctypes.Structure,),
+        {
+            "__module__": cls.__module__,
+            "__qualname__": cls.__qualname__,
+            "_fields_": fields,
+            "__init__": nice_init,
+        },
+    )
+    return struct  # type: ignore
+
+
+_PRIMITIVE_CTYPES: Dict[Any, Any] = {
+    int: ctypes.c_int,
+    float: ctypes.c_float,
+    bool: ctypes.c_bool,
+    bytes: ctypes.c_char_p,
+}
 
 
 @functools.lru_cache(256)
 def _py_type_to_ctype(t: type) -> type:
+    ctype = _PRIMITIVE_CTYPES.get(t)
+    if ctype is not None:
+        return ctype  # type: ignore
     if isinstance(t, str):
         raise ValueError(
             f"Type parsing of '{t}' isn't supported, you need to provide a real type annotation."
@@ -49,14 +66,6 @@ def _py_type_to_ctype(t: type) -> type:
             return t
         if issubclass(t, ctypes._Pointer):
             return t
-    if t is int:
-        return ctypes.c_int
-    if t is float:
-        return ctypes.c_float
-    if t is bool:
-        return ctypes.c_bool
-    if t is bytes:
-        return ctypes.c_char_p
     if t is str:
         raise ValueError("str type is't supported by ctypes ?")
 
@@ -86,12 +95,9 @@ def _c_fn(module: Any, fn: F) -> F:
     ]
     c_fn.restype = _py_type_to_ctype(fn.__annotations__["return"])
 
-    @functools.wraps(fn)
-    def actual_fn(*args, **kwargs):  # type: ignore
-        raw_res = c_fn(*args, **kwargs)
-        return raw_res
-
-    return actual_fn  # type: ignore
+    # ctypes function pointers are already callable and accept attribute
+    # assignment, so we return them directly instead of adding a Python frame.
+    return functools.wraps(fn)(c_fn)  # type: ignore
 
 
 def c_fn(module: Any) -> Callable[[F], F]:
@@ -17,3 +17,6 @@ from seamless_communication.cli.eval_utils.lang_mapping import (
 from seamless_communication.cli.eval_utils.lang_mapping import (
     LANG3_LANG2 as LANG3_LANG2,
 )
+from seamless_communication.cli.eval_utils.lang_mapping import (
+    LANG3_LANG2S as LANG3_LANG2S,
+)
@@ -4,6 +4,7 @@
 # This source code is licensed under the license found in the
 # MIT_LICENSE file in the root directory of this source tree.
 
+import functools
 import json
 import logging
 from pathlib import Path
@@ -185,6 +186,13 @@ def get_tokenizer(lang: str, metric: str = "bleu") -> str:
     return tok
 
 
+@functools.lru_cache(maxsize=8)
+def _get_bleu(lowercase: bool, tokenize: str) -> BLEU:
+    # Reusing the metric across calls also reuses its tokenizer, which memoizes
+    # tokenized sentences.
+    return BLEU(lowercase=lowercase, tokenize=tokenize)
+
+
 def compute_asr_error_rate(
     hyp_text_series: pd.Series,
     ref_text_series: pd.Series,
@@ -233,7 +241,7 @@ def compute_corpus_metric_score(
     tokenizer_name = get_tokenizer(lang)
     corpus_metric_score_metric: Union[BLEU, CHRF]
     if metric == "bleu":
-        corpus_metric_score_metric = BLEU(
+        corpus_metric_score_metric = _get_bleu(
             lowercase=whisper_normalize_text, tokenize=tokenizer_name
         )  # lowercase applied if we use whisper_normalize_text
     elif metric == "chrF++":
@@ -213,8 +213,8 @@ def main() -> None:
     waveforms_dir = output_path / "waveform"
     waveforms_dir.mkdir(parents=True, exist_ok=True)
 
-    hyps = []
-    refs = []
+    num_hyps = 0
+    num_refs = 0
     audio_hyps = []
 
     with contextlib.ExitStack() as stack:
@@ -273,9 +273,10 @@ def main() -> None:
                     speech_output,
                 )
 
-            hyps += [str(s) for s in text_output]
+            # Outputs are streamed to the files below; only count them here.
+            num_hyps += len(text_output)
             if args.ref_field is not None and args.ref_field in example:
-                refs += [str(s) for s in example[args.ref_field]]
+                num_refs += len(example[args.ref_field])
 
             for i in range(len(text_output)):
                 t = text_output[i]
@@ -296,7 +297,7 @@ def main() -> None:
                 progress_bar.update(1)
 
     progress_bar.close()
-    logger.info(f"Processed {len(hyps)} hyps, {len(refs)} refs")
+    logger.info(f"Processed {num_hyps} hyps, {num_refs} refs")
 
     if args.output_result_tsv:
         output_tsv_file = output_path / f"generate-{args.data_file.stem}.tsv"
@@ -6,14 +6,17 @@
 
 import argparse
 import contextlib
+import functools
 import itertools
 import logging
-import subprocess
 import json
+import os
+import sys
 from argparse import Namespace
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 import torch
 import torchaudio
@@ -107,46 +110,91 @@ class EvalContext:
     """If True, removes consecutive repeating ngrams
     from the decoded unit output."""
 
+    def __post_init__(self) -> None:
+        # These are used as keys in downstream lookups (tokenizers, language
+        # mappings), interning them makes those comparisons pointer checks.
+        self.task = sys.intern(self.task)
+        self.target_lang = sys.intern(self.target_lang)
+        if self.source_lang is not None:
+            self.source_lang = sys.intern(self.source_lang)
+
 
 def count_lines(filename: Path) -> int:
-    result = subprocess.run(["wc", "-l", filename], stdout=subprocess.PIPE)
-    return int(result.stdout.decode().split()[0])
+    # Equivalent to `wc -l`, without spawning a subprocess.
+    with open(filename, "rb") as f:
+        chunks = iter(lambda: f.read(1 << 20), b"")
+        return sum(chunk.count(b"\n") for chunk in chunks)
+
+
+def _format_json(line: StringLike) -> Dict[str, Any]:
+    example = json.loads(str(line))
+    return {
+        "src_text": example["source"]["text"],
+        "src_lang": example["source"]["lang"],
+        "audio": example["source"]["audio_local_path"],
+        "tgt_text": example["target"]["text"],
+    }
+
+
+# `mtime` is only part of the cache key, so that a modified file is re-read. The
+# header and the first example come from a single read of the file.
+@functools.lru_cache(maxsize=32)
+def _read_head(
+    data_file: str, data_file_type: str, mtime: float
+) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    with open(data_file, "r") as f:
+        if data_file_type == "TSV":
+            header = tuple(f.readline().rstrip("\n").split("\t"))
+            return header, tuple(f.readline().rstrip("\n").split("\t"))
+        first_example = _format_json(f.readline())
+        return tuple(first_example.keys()), tuple(first_example.values())
+
+
+# Upper bounds, in fbank frames (10ms each), of the length buckets used to batch
+# speech inputs. Longer utterances are skipped with a warning.
+SPEECH_BUCKET_MAX_LENS = (500, 1000, 2000, 4000, 100_000)
+
+
+def _fits_speech_buckets(example: Dict[str, Any]) -> bool:
+    num_frames = example["audio"]["data"]["fbank"].size(0)
+    if num_frames <= SPEECH_BUCKET_MAX_LENS[-1]:
+        return True
+    logger.warning(
+        f"Skipping row {example['row_id']}: its {num_frames} fbank frames exceed "
+        f"the longest speech bucket ({SPEECH_BUCKET_MAX_LENS[-1]} frames)."
+    )
+    return False
 
 
 def build_data_pipeline(
     ctx: EvalContext,
     text_tokenizer: TextTokenizer,
 ) -> DataPipeline:
-    
-    if ctx.data_file_type == "TSV":
-        with open(ctx.data_file, "r") as f:
-            header = f.readline().strip("\n").split("\t")
-            first_example = f.readline().strip("\n").split("\t")
+    if ctx.data_file_type not in ("TSV", "JSON"):
+        raise NotImplementedError
 
-        format_tsv = StrSplitter(names=header)
-        pipeline_builder = read_text(ctx.data_file, rtrim=True).skip(1).map(format_tsv)
-        
-    elif ctx.data_file_type == "JSON":
-        def format_json(line: str):
-            example = json.loads(str(line))
-            return {
-                "src_text": example["source"]["text"],
-                "src_lang": example["source"]["lang"],
-                "audio": example["source"]["audio_local_path"],
-                "tgt_text": example["target"]["text"],
-            }
-        
-        with open(ctx.data_file, "r") as f:
-            header = list(format_json(f.readline()).keys())
-            first_example = list(format_json(f.readline()).values())
-            
-        pipeline_builder = read_text(ctx.data_file, rtrim=True).map(format_json)
-        
+    data_file_key = (
+        str(ctx.data_file),
+        ctx.data_file_type,
+        os.path.getmtime(ctx.data_file),
+    )
+    header, first_example = _read_head(*data_file_key)
+
+    if ctx.data_file_type == "TSV":
+        format_tsv = StrSplitter(names=list(header))
+        lines = read_text(ctx.data_file, rtrim=True).skip(1).map(format_tsv)
     else:
-        raise NotImplementedError
+        lines = read_text(ctx.data_file, rtrim=True).map(_format_json)
+
+    # Tag every example with its 0-based row index in the data file, so that
+    # outputs can be traced back to their inputs after length bucketing.
+    pipeline_builder = DataPipeline.zip(
+        [DataPipeline.count(key="row_id").and_return(), lines.and_return()],
+        zip_to_shortest=True,
+        flatten=True,
+    )
 
-    # TODO: This will be soon auto-tuned. Right now hand-tuned for devfair.
-    n_parallel = 4
+    n_parallel = max(1, min((os.cpu_count() or 1) // 2, 8))
     if ctx.input_modality == Modality.SPEECH:
         assert ctx.audio_root_dir is not None
 
@@ -154,15 +202,17 @@ def build_data_pipeline(
 
         pipeline_builder.map(map_file, selector="audio", num_parallel_calls=n_parallel)
 
-        decode_audio = AudioDecoder(dtype=torch.float32, device=ctx.device)
+        # Features are computed on CPU by the pipeline workers and copied to
+        # `ctx.device` asynchronously in `run_eval`.
+        decode_audio = AudioDecoder(dtype=torch.float32, device=torch.device("cpu"))
 
         convert_to_fbank = WaveformToFbankConverter(
             num_mel_bins=80,
             waveform_scale=2**15,
             channel_last=True,
             standardize=True,
-            device=ctx.device,
-            dtype=ctx.dtype,
+            device=torch.device("cpu"),
+            dtype=torch.float32,
         )
 
         pipeline_builder.map(
@@ -171,19 +221,20 @@ def build_data_pipeline(
             num_parallel_calls=n_parallel,
         )
     else:
-        if "src_lang" in header:
-            source_lang = first_example[header.index("src_lang")]
-            ctx.source_lang = source_lang
-        elif ctx.source_lang is None:
-            raise ValueError(
-                (
-                    "'src_lang' is missing in the data_file"
-                    "header and in the arguments."
+        # The source language is only read from the data file when it is not
+        # given in the arguments.
+        if ctx.source_lang is None:
+            if "src_lang" not in header:
+                raise ValueError(
+                    (
+                        "'src_lang' is missing in the data_file"
+                        "header and in the arguments."
+                    )
                 )
-            )
+            ctx.source_lang = sys.intern(first_example[header.index("src_lang")])
 
         token_encoder = text_tokenizer.create_encoder(
-            task="translation", lang=source_lang, mode="source", device=ctx.device
+            task="translation", lang=ctx.source_lang, mode="source", device=ctx.device
         )
         pipeline_builder.map(
             [token_encoder],
@@ -191,60 +242,93 @@ def build_data_pipeline(
             num_parallel_calls=n_parallel,
         )
 
-    pipeline_builder.bucket(bucket_size=ctx.batch_size)
+    if ctx.input_modality == Modality.SPEECH:
+        pipeline_builder.filter(_fits_speech_buckets)
+
+        # Batch utterances of similar length together to reduce padding. This
+        # changes the order of the samples with respect to the data file; use
+        # "row_id" to map outputs back to their rows.
+        bucket_sizes = [(ctx.batch_size, max_len) for max_len in SPEECH_BUCKET_MAX_LENS]
+        pipeline_builder.bucket_by_length(bucket_sizes, selector="audio.data.fbank")
+    else:
+        pipeline_builder.bucket(bucket_size=ctx.batch_size)
 
     collate = Collater(pad_value=0, pad_to_multiple=1)
 
     pipeline_builder.map(collate, num_parallel_calls=n_parallel)
 
-    pipeline_builder.prefetch(4)
+    pipeline_builder.prefetch(8 if ctx.device.type == "cuda" else 4)
 
     return pipeline_builder.and_return()
 
 
+_SILENCE: Dict[int, Tensor] = {}
+
+
+def _silence(sample_rate: int) -> Tensor:
+    # One second of silence, shared by all corrupted inputs. The waveforms are
+    # only read when saved, so the same tensor is safe to reuse.
+    silence = _SILENCE.get(sample_rate)
+    if silence is None:
+        silence = torch.zeros(1, 1, sample_rate).share_memory_()
+        _SILENCE[sample_rate] = silence
+    return silence
+
+
 def adjust_output_for_corrupted_inputs(
     valid_sequences: Tensor,
     text_output: List[StringLike],
     speech_output: Optional[BatchedSpeechOutput],
 ) -> Tuple[List[StringLike], Optional[BatchedSpeechOutput]]:
-    adjusted_text_output: List[StringLike] = []
-    adjusted_speech_output: Optional[BatchedSpeechOutput] = None
+    # For the corrupted inputs, we save the following dummy outputs:
+    # empty string for text, empty list for units, 1 second of silence for audio.
+    batch_size = len(valid_sequences)
+    valid_indices = torch.nonzero(valid_sequences, as_tuple=True)[0].tolist()
+    assert len(valid_indices) == len(text_output)
+
+    adjusted_text_output: List[StringLike] = [""] * batch_size
+    for src_idx, dst_idx in enumerate(valid_indices):
+        adjusted_text_output[dst_idx] = text_output[src_idx]
 
+    adjusted_speech_output: Optional[BatchedSpeechOutput] = None
     if speech_output is not None:
         assert (
             len(text_output)
             == len(speech_output.units)
             == len(speech_output.audio_wavs)
         )
-        adjusted_speech_output = BatchedSpeechOutput(units=[], audio_wavs=[])
-
-    batch_counter = 0
-    for is_valid in valid_sequences:
-        if is_valid:
-            adjusted_text_output.append(text_output[batch_counter])
-            if speech_output is not None:
-                assert adjusted_speech_output is not None
-                adjusted_speech_output.units.append(speech_output.units[batch_counter])
-                adjusted_speech_output.audio_wavs.append(
-                    speech_output.audio_wavs[batch_counter]
-                )
-            batch_counter += 1
-        else:
-            # For the corrupted inputs, we save the following dummy outputs:
-            # empty string for text, empty list for units, 1 second of silence for audio.
-            adjusted_text_output.append("")
-            if adjusted_speech_output is not None:
-                sample_rate = adjusted_speech_output.sample_rate
-                adjusted_speech_output.units.append([])
-                adjusted_speech_output.audio_wavs.append(
-                    torch.zeros(sample_rate).unsqueeze(0).unsqueeze(0)
-                )
+        sample_rate = speech_output.sample_rate
+        adjusted_speech_output = BatchedSpeechOutput(
+            units=[[] for _ in range(batch_size)],
+            audio_wavs=[_silence(sample_rate)] * batch_size,
+            sample_rate=sample_rate,
+        )
+        for src_idx, dst_idx in enumerate(valid_indices):
+            adjusted_speech_output.units[dst_idx] = speech_output.units[src_idx]
+            adjusted_speech_output.audio_wavs[dst_idx] = speech_output.audio_wavs[
+                src_idx
+            ]
+
     return (
         adjusted_text_output,
         adjusted_speech_output,
     )
 
 
+def _check_wav_writes(
+    futures: Set["Future[None]"], max_pending: int
+) -> Set["Future[None]"]:
+    # Re-raise errors of finished waveform writes right away, and block until at
+    # most `max_pending` writes (and their waveforms) are still in flight.
+    while True:
+        timeout = None if len(futures) > max_pending else 0
+        done, futures = wait(futures, timeout=timeout, return_when=FIRST_COMPLETED)
+        for future in done:
+            future.result()
+        if len(futures) <= max_pending:
+            return futures
+
+
 def run_eval(
     translator: Translator,
     ctx: EvalContext,
@@ -265,30 +349,58 @@ def run_eval(
 
     model_outputs_tsv = output_path / f"model-outputs-{ctx.data_file.stem}.txt"
     unit_outputs_tsv = output_path / f"unit_output-{ctx.data_file.stem}.txt"
-    with open(model_outputs_tsv, "w") as hyp_file, open(
-        unit_outputs_tsv, "w"
+    # Waveforms are encoded and written by worker threads so that the next
+    # batch can be decoded in the meantime.
+    wav_writer = ThreadPoolExecutor(max_workers=4)
+    wav_futures: Set["Future[None]"] = set()
+    # Outputs are written one line per sample; a 1 MiB buffer batches these
+    # small writes into few syscalls.
+    open_output = functools.partial(
+        open, mode="w", buffering=1 << 20, encoding="utf-8", newline="\n"
+    )
+    with wav_writer, open_output(model_outputs_tsv) as hyp_file, open_output(
+        unit_outputs_tsv
     ) if ctx.output_modality == Modality.SPEECH else contextlib.nullcontext(
         itertools.repeat(None)
     ) as unit_file:
         sample_id = 0
+        ref_field = ctx.ref_field
         if ctx.output_modality == Modality.SPEECH:
-            hyp_file.write("ref_tgt_text\tpred_tgt_text\tpred_tgt_audio\n")
+            hyp_file.write("row_id\tref_tgt_text\tpred_tgt_text\tpred_tgt_audio\n")
         else:
-            hyp_file.write("ref_tgt_text\tpred_tgt_text\n")
+            hyp_file.write("row_id\tref_tgt_text\tpred_tgt_text\n")
         for example in pipeline:
+            row_ids = example["row_id"].tolist()
             valid_sequences: Optional[Tensor] = None
+            all_valid = True
             if ctx.input_modality == Modality.SPEECH:
                 src = example["audio"]["data"]["fbank"]
-                # Skip corrupted audio tensors.
-                valid_sequences = ~torch.any(
-                    torch.any(torch.isnan(src["seqs"]), dim=1), dim=1
+                # Skip corrupted audio tensors. The fbanks are still on CPU at this
+                # point, so the check needs no device round-trip and only valid
+                # sequences are copied to `ctx.device` below.
+                assert src["seqs"].device.type == "cpu"
+                valid_sequences = (
+                    torch.isnan(src["seqs"]).flatten(1).any(dim=1).logical_not_()
                 )
-                if not valid_sequences.all():
-                    logger.warning(
-                        f"Sample IDs {sample_id} to {sample_id + ctx.batch_size} has some corrupted input."
-                    )
+                all_valid = bool(valid_sequences.all())
+                if not all_valid:
+                    corrupted_row_ids = [
+                        row_id
+                        for row_id, valid in zip(row_ids, valid_sequences.tolist())
+                        if not valid
+                    ]
+                    logger.warning(f"Rows {corrupted_row_ids} have corrupted input.")
                     src["seqs"] = src["seqs"][valid_sequences]
                     src["seq_lens"] = src["seq_lens"][valid_sequences]
+                if ctx.device.type == "cuda":
+                    # Copy from pinned memory so the transfer does not block the
+                    # host while the previous batch is still being decoded.
+                    src["seqs"] = src["seqs"].pin_memory()
+                    src["seq_lens"] = src["seq_lens"].pin_memory()
+                src["seqs"] = src["seqs"].to(
+                    ctx.device, dtype=ctx.dtype, non_blocking=True
+                )
+                src["seq_lens"] = src["seq_lens"].to(ctx.device, non_blocking=True)
             else:
                 src = example["src_text"]
 
@@ -316,31 +428,37 @@ def run_eval(
                 else:
                     speech_output = None
 
-            if valid_sequences is not None and not valid_sequences.all():
+            if valid_sequences is not None and not all_valid:
                 (text_output, speech_output,) = adjust_output_for_corrupted_inputs(
                     valid_sequences,
                     text_output,
                     speech_output,
                 )
 
-            hyps = [str(s) for s in text_output]
-            refs = [str(s) for s in example[ctx.ref_field]]
-
+            # Hypotheses and references are streamed to `hyp_file` one sample at
+            # a time; metrics are computed from that file once decoding is done.
+            # f-strings format `StringLike` values directly, no `str()` needed.
+            refs = example[ref_field]
             for i in range(len(text_output)):
+                hyp = text_output[i]
+                ref = refs[i]
+                row_id = row_ids[i]
                 if ctx.output_modality == Modality.SPEECH:
                     assert speech_output is not None
-                    u = speech_output.units[i]
-                    str_units = [str(i) for i in u]
-                    unit_file.write(" ".join(str_units) + "\n")
-                    wav_fp = str(waveforms_dir / f"{sample_id}_pred.wav")
-                    torchaudio.save(
-                        wav_fp,
-                        speech_output.audio_wavs[i][0].to(torch.float32).cpu(),
-                        sample_rate=speech_output.sample_rate,
+                    unit_file.write(" ".join(map(str, speech_output.units[i])) + "\n")
+                    wav_fp = str(waveforms_dir / f"{row_id}_pred.wav")
+                    wav_futures.add(
+                        wav_writer.submit(
+                            torchaudio.save,
+                            wav_fp,
+                            speech_output.audio_wavs[i][0].to(torch.float32).cpu(),
+                            sample_rate=speech_output.sample_rate,
+                        )
                     )
-                    hyp_file.write(f"{refs[i]}\t{hyps[i]}\t{wav_fp}\n")
+                    wav_futures = _check_wav_writes(wav_futures, max_pending=16)
+                    hyp_file.write(f"{row_id}\t{ref}\t{hyp}\t{wav_fp}\n")
                 else:
-                    hyp_file.write(f"{refs[i]}\t{hyps[i]}\n")
+                    hyp_file.write(f"{row_id}\t{ref}\t{hyp}\n")
 
                 sample_id += 1
                 progress_bar.update(1)
@@ -349,6 +467,8 @@ def run_eval(
             if n_samples and progress_bar.n == n_samples:
                 break
 
+    _check_wav_writes(wav_futures, max_pending=0)
+
     progress_bar.close()
     logger.info(f"Processed {sample_id} samples")
 
@@ -382,6 +502,39 @@ def load_checkpoint(model: UnitYModel, path: str, device = torch.device("cpu"))
     model.final_proj.load_state_dict(_select_keys(saved_model, "model.final_proj."))
 
 
+@functools.lru_cache(maxsize=1)
+def load_translator(
+    model_name: str,
+    vocoder_name: str,
+    device: Device,
+    dtype: DataType,
+    input_modality: Modality,
+    output_modality: Modality,
+    checkpoint_path: Optional[str] = None,
+    checkpoint_mtime: Optional[float] = None,
+) -> Translator:
+    # Cached so that repeated `main()` calls in the same process (e.g. sweeps
+    # over languages or data files) load the model weights only once. Only the
+    # last translator is kept; call `load_translator.cache_clear()` to free it.
+    # `checkpoint_mtime` is only part of the cache key, so that a checkpoint
+    # overwritten in place is reloaded.
+    # TODO: Avoid loading the T2U model, vocoder when the output
+    # modality is text.
+    translator = Translator(
+        model_name,
+        vocoder_name,
+        device,
+        dtype=dtype,
+        input_modality=input_modality,
+        output_modality=output_modality,
+    )
+
+    if checkpoint_path:
+        load_checkpoint(translator.model, path=checkpoint_path, device=device)
+
+    return translator
+
+
 def main(optional_args: Optional[Dict[str, Any]] = None) -> None:
     parser = argparse.ArgumentParser(
         description="M4T evaluation for tasks supported by Translator."
@@ -433,7 +586,11 @@ def main(optional_args: Optional[Dict[str, Any]] = None) -> None:
     parser.add_argument(
         "--n_samples",
         type=int,
-        help="Number of Samples to run eval on. All if None.",
+        help="Number of Samples to run eval on. All if None. Speech inputs are "
+        "batched by length, so these are the first `n_samples` decoded samples; "
+        "see the `row_id` column of the model outputs for their data file rows. "
+        f"Utterances longer than {SPEECH_BUCKET_MAX_LENS[-1]} fbank frames are "
+        "skipped.",
         default=None,
     )
     args, _ = parser.parse_known_args()
@@ -464,19 +621,16 @@ def main(optional_args: Optional[Dict[str, Any]] = None) -> None:
     device = torch.device(args.device)
     dtype = torch.float16 if device.type == "cuda" else torch.float32
 
-    # TODO: Avoid loading the T2U model, vocoder when the output
-    # modality is text.
-    translator = Translator(
+    translator = load_translator(
         args.model_name,
         args.vocoder_name,
         device,
-        dtype=dtype,
-        input_modality=input_modality,
-        output_modality=output_modality,
+        dtype,
+        input_modality,
+        output_modality,
+        args.load_checkpoint,
+        os.path.getmtime(args.load_checkpoint) if args.load_checkpoint else None,
     )
-    
-    if args.load_checkpoint:
-        load_checkpoint(translator.model, path=args.load_checkpoint, device=device)
 
     text_generation_opts, unit_generation_opts = set_generation_opts(args)
 
@@ -7,7 +7,8 @@ from __future__ import annotations
 
 import logging
 from argparse import ArgumentParser, Namespace
-from typing import Any, Dict, List, Optional, Union
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple, Type, Union
 
 import torch
 from fairseq2.assets import asset_store
@@ -194,16 +195,62 @@ class UnitYAgentPipeline(UnitYPipelineMixin, AgentPipeline):  # type: ignore
         return cls(args)
 
 
+def topological_order(
+    pipeline: Dict[Type[GenericAgent], List[Type[GenericAgent]]]
+) -> Tuple[Type[GenericAgent], ...]:
+    """Return the agent classes of ``pipeline`` in topological order."""
+    indegree = {module_class: 0 for module_class in pipeline}
+    for module_class, children in pipeline.items():
+        for child in children:
+            if child not in indegree:
+                raise ValueError(
+                    f"{child.__name__}, a child of {module_class.__name__}, "
+                    "is not in the agent pipeline."
+                )
+            indegree[child] += 1
+
+    queue = deque(c for c, degree in indegree.items() if degree == 0)
+    order = []
+    while queue:
+        module_class = queue.popleft()
+        order.append(module_class)
+        for child in pipeline[module_class]:
+            indegree[child] -= 1
+            if indegree[child] == 0:
+                queue.append(child)
+
+    if len(order) != len(pipeline):
+        raise ValueError("The agent pipeline contains a cycle.")
+
+    return tuple(order)
+
+
 class UnitYAgentTreePipeline(UnitYPipelineMixin, TreeAgentPipeline):  # type: ignore
     pipeline: Any = {}
 
+    topo_order: Tuple[Type[GenericAgent], ...] = ()
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+
+        if cls.pipeline:
+            cls.topo_order = topological_order(cls.pipeline)
+
     def __init__(self, args: Namespace):
         models_and_configs = self.load_model(args)
 
         assert len(self.pipeline) > 0
-        module_dict = {}
-        for module_class, children in self.pipeline.items():
-            module_dict[module_class.from_args(args, **models_and_configs)] = children
+        instances = {
+            module_class: module_class.from_args(args, **models_and_configs)
+            for module_class in self.topo_order
+        }
+
+        # Children are passed as instances, so simuleval does not have to scan
+        # the module dict to find the instance of each child class.
+        module_dict = {
+            instances[module_class]: [instances[child] for child in children]
+            for module_class, children in self.pipeline.items()
+        }
 
         super().__init__(module_dict, args)
 
@@ -0,0 +1,154 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates
+# All rights reserved.
+#
+# This source code is licensed under the license found in the
+# MIT_LICENSE file in the root directory of this source tree.
+
+from pathlib import Path
+from typing import List
+
+import torch
+import torchaudio
+from pytest import MonkeyPatch
+
+from seamless_communication.cli.m4t.evaluate import evaluate
+from seamless_communication.cli.m4t.evaluate.evaluate import (
+    EvalContext,
+    adjust_output_for_corrupted_inputs,
+    build_data_pipeline,
+)
+from seamless_communication.inference import (
+    BatchedSpeechOutput,
+    Modality,
+    SequenceGeneratorOptions,
+)
+from tests.common import device
+
+# Durations, in seconds, of the test utterances.
+DURATIONS = [0.5, 3.0, 1.0, 6.0, 0.7]
+
+
+def make_speech_ctx(tmp_path: Path) -> EvalContext:
+    audio_dir = tmp_path / "audio"
+    audio_dir.mkdir()
+
+    lines = ["id\taudio\ttgt_text"]
+    for idx, duration in enumerate(DURATIONS):
+        waveform = torch.rand(1, int(16000 * duration)) * 0.1 - 0.05
+        torchaudio.save(str(audio_dir / f"{idx}.wav"), waveform, sample_rate=16000)
+        lines.append(f"{idx}\t{idx}.wav\ttext {idx}")
+
+    data_file = tmp_path / "test.tsv"
+    data_file.write_text("\n".join(lines) + "\n")
+
+    return EvalContext(
+        task="S2TT",
+        input_modality=Modality.SPEECH,
+        output_modality=Modality.TEXT,
+        model_name="seamlessM4T_v2_large",
+        data_file=data_file,
+        data_file_type="TSV",
+        audio_root_dir=audio_dir,
+        target_lang="eng",
+        source_lang=None,
+        batch_size=2,
+        device=device,
+        dtype=torch.float32,
+        output_path=tmp_path / "out",
+        ref_field="tgt_text",
+        text_generation_opts=SequenceGeneratorOptions(),
+        unit_generation_opts=None,
+        unit_generation_ngram_filtering=False,
+    )
+
+
+def read_ids(ctx: EvalContext) -> List[List[int]]:
+    # The text tokenizer is only used for text input.
+    pipeline = build_data_pipeline(ctx, text_tokenizer=None)  # type: ignore[arg-type]
+
+    batches = []
+    for example in pipeline:
+        fbank = example["audio"]["data"]["fbank"]
+
+        assert fbank["seqs"].device.type == "cpu"
+        assert fbank["seqs"].size(0) == len(example["id"])
+
+        ids = [int(str(i)) for i in example["id"]]
+
+        # The test data files list their rows in "id" order.
+        assert example["row_id"].tolist() == ids
+
+        batches.append(ids)
+
+    return batches
+
+
+class TestBuildDataPipeline:
+    def test_speech_bucketing_works(self, tmp_path: Path) -> None:
+        ctx = make_speech_ctx(tmp_path)
+
+        batches = read_ids(ctx)
+
+        assert all(0 < len(batch) <= ctx.batch_size for batch in batches)
+
+        assert sorted(i for batch in batches for i in batch) == list(
+            range(len(DURATIONS))
+        )
+
+        # The 6 second utterance does not share a bucket with the short ones.
+        assert [3] in batches
+
+    def test_long_speech_skipping_works(
+        self, tmp_path: Path, monkeypatch: MonkeyPatch
+    ) -> None:
+        monkeypatch.setattr(evaluate, "SPEECH_BUCKET_MAX_LENS", (200, 400))
+
+        ctx = make_speech_ctx(tmp_path)
+
+        batches = read_ids(ctx)
+
+        # The 6 second utterance is longer than the longest bucket.
+        assert sorted(i for batch in batches for i in batch) == [0, 1, 2, 4]
+
+
+class TestAdjustOutputForCorruptedInputs:
+    def test_text_works(self) -> None:
+        valid_sequences = torch.tensor([False, True, True, False, True])
+
+        text_output, speech_output = adjust_output_for_corrupted_inputs(
+            valid_sequences, ["a", "b", "c"], None
+        )
+
+        assert text_output == ["", "a", "b", "", "c"]
+
+        assert speech_output is None
+
+    def test_speech_works(self) -> None:
+        valid_sequences = torch.tensor([True, False, False, True])
+
+        wavs = [torch.ones(1, 1, 10), torch.full((1, 1, 20), 2.0)]
+
+        text_output, speech_output = adjust_output_for_corrupted_inputs(
+            valid_sequences,
+            ["a", "b"],
+            BatchedSpeechOutput(
+                units=[[1, 2], [3]], audio_wavs=wavs, sample_rate=24000
+            ),
+        )
+
+        assert text_output == ["a", "", "", "b"]
+
+        assert speech_output is not None
+
+        assert speech_output.sample_rate == 24000
+
+        assert speech_output.units == [[1, 2], [], [], [3]]
+
+        assert speech_output.audio_wavs[0] is wavs[0]
+        assert speech_output.audio_wavs[3] is wavs[1]
+
+        # Corrupted inputs get one second of silence at the output sample rate.
+        for silence in speech_output.audio_wavs[1:3]:
+            assert silence.shape == (1, 1, 24000)
+
+            assert not silence.any()
@@ -0,0 +1,57 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates
+# All rights reserved.
+#
+# This source code is licensed under the license found in the
+# MIT_LICENSE file in the root directory of this source tree.
+
+import pytest
+
+from seamless_communication.streaming.agents.unity_pipeline import topological_order
+
+
+class AgentA:
+    pass
+
+
+class AgentB:
+    pass
+
+
+class AgentC:
+    pass
+
+
+class AgentD:
+    pass
+
+
+class TestTopologicalOrder:
+    def test_order_works(self) -> None:
+        pipeline = {
+            AgentD: [],
+            AgentC: [AgentD],
+            AgentA: [AgentB, AgentC],
+            AgentB: [],
+        }
+
+        order = topological_order(pipeline)  # type: ignore[arg-type]
+
+        assert order[0] is AgentA
+
+        assert set(order) == set(pipeline)
+
+        for module_class, children in pipeline.items():
+            for child in children:
+                assert order.index(module_class) < order.index(child)
+
+    def test_cycle_raises_error(self) -> None:
+        pipeline = {AgentA: [AgentB], AgentB: [AgentC], AgentC: [AgentB]}
+
+        with pytest.raises(ValueError, match="contains a cycle"):
+            topological_order(pipeline)  # type: ignore[arg-type]
+
+    def test_missing_child_raises_error(self) -> None:
+        pipeline = {AgentA: [AgentB], AgentB: [AgentC]}
+
+        with pytest.raises(ValueError, match="AgentC, a child of AgentB"):
+            topological_order(pipeline)  # type: ignore[arg-type]